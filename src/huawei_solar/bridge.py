@@ -50,7 +50,7 @@ class HuaweiSolarBridge:
         self.power_meter_online = False
         self.power_meter_type: t.Optional[rv.MeterType] = None
 
-        self._pv_registers = None
+        self._state_alarm_and_pv_registers: t.Tuple[str, ...] = ()
 
         self.__heartbeat_enabled = False
         self.__heartbeat_task: t.Optional[asyncio.Task] = None
@@ -158,7 +158,7 @@ class HuaweiSolarBridge:
         if bridge.power_meter_online or bridge.battery_type != rv.StorageProductModel.NONE:
             bridge.power_meter_type = (await bridge.client.get(rn.METER_TYPE, bridge.slave_id)).value
 
-    async def _get_multiple_to_dict(self, names: list[str]) -> dict[str, Result]:
+    async def _get_multiple_to_dict(self, names: t.Sequence[str]) -> dict[str, Result]:
         return dict(zip(names, await self.client.get_multiple(names, self.slave_id)))
 
     async def update(self) -> dict[str, Result]:
@@ -168,8 +168,7 @@ class HuaweiSolarBridge:
         async with self.update_lock:
             result = await self._get_multiple_to_dict(INVERTER_REGISTERS)
 
-            # State and Alarm registers can be combined with PV registers due to close proximity
-            result.update(await self._get_multiple_to_dict(STATE_AND_ALARM_REGISTERS + self._pv_registers))
+            result.update(await self._get_multiple_to_dict(self._state_alarm_and_pv_registers))
 
             if self.has_optimizers:
                 result.update(await self._get_multiple_to_dict(OPTIMIZER_REGISTERS))
@@ -280,15 +279,19 @@ class HuaweiSolarBridge:
         """Get the registers for the PV strings which were detected from the inverter"""
         assert 1 <= self.pv_string_count <= 24
 
-        self._pv_registers = []
+        pv_registers = []
         for idx in range(1, self.pv_string_count + 1):
-            self._pv_registers.extend(
+            pv_registers.extend(
                 [
                     getattr(rn, f"PV_{idx:02}_VOLTAGE"),
                     getattr(rn, f"PV_{idx:02}_CURRENT"),
                 ]
             )
 
+        # State and Alarm registers can be combined with PV registers due to close proximity.
+        # The names are kept in a tuple, which is used as is to look up the cached read plan.
+        self._state_alarm_and_pv_registers = STATE_AND_ALARM_REGISTERS + tuple(pv_registers)
+
     async def stop(self):
         """Stop the bridge."""
         self.__heartbeat_enabled = False
@@ -382,7 +385,7 @@ class HuaweiSolarBridge:
 
 
 # Registers which should always be read
-INVERTER_REGISTERS = [
+INVERTER_REGISTERS = (
     rn.INPUT_POWER,
     rn.LINE_VOLTAGE_A_B,
     rn.LINE_VOLTAGE_B_C,
@@ -407,23 +410,23 @@ INVERTER_REGISTERS = [
     rn.SHUTDOWN_TIME,
     rn.ACCUMULATED_YIELD_ENERGY,
     rn.DAILY_YIELD_ENERGY,
-]
+)
 
 # State and alarm registers can be combined with PV String readout
-STATE_AND_ALARM_REGISTERS = [
+STATE_AND_ALARM_REGISTERS = (
     rn.STATE_1,
     rn.STATE_2,
     rn.STATE_3,
     rn.ALARM_1,
     rn.ALARM_2,
     rn.ALARM_3,
-]
+)
 
 # Registers that should be read if optimizers are present
-OPTIMIZER_REGISTERS = [rn.NB_ONLINE_OPTIMIZERS]
+OPTIMIZER_REGISTERS = (rn.NB_ONLINE_OPTIMIZERS,)
 
 # Registers that should be read if a power meter is present
-POWER_METER_REGISTERS = [
+POWER_METER_REGISTERS = (
     rn.METER_STATUS,
     rn.GRID_A_VOLTAGE,
     rn.GRID_B_VOLTAGE,
@@ -445,10 +448,10 @@ POWER_METER_REGISTERS = [
     rn.ACTIVE_GRID_A_POWER,
     rn.ACTIVE_GRID_B_POWER,
     rn.ACTIVE_GRID_C_POWER,
-]
+)
 
 # Registers that should be read if a battery is present
-ENERGY_STORAGE_REGISTERS = [
+ENERGY_STORAGE_REGISTERS = (
     rn.STORAGE_STATE_OF_CAPACITY,
     rn.STORAGE_RUNNING_STATUS,
     rn.STORAGE_BUS_VOLTAGE,
@@ -458,10 +461,10 @@ ENERGY_STORAGE_REGISTERS = [
     rn.STORAGE_TOTAL_DISCHARGE,
     rn.STORAGE_CURRENT_DAY_CHARGE_CAPACITY,
     rn.STORAGE_CURRENT_DAY_DISCHARGE_CAPACITY,
-]
+)
 
 # Covers registers 47075 - 47088 (maximum would be 47139)
-ENERGY_STORAGE_CONFIGURATION_PARAMETERS_1 = [
+ENERGY_STORAGE_CONFIGURATION_PARAMETERS_1 = (
     rn.STORAGE_MAXIMUM_CHARGING_POWER,
     rn.STORAGE_MAXIMUM_DISCHARGING_POWER,
     rn.STORAGE_CHARGING_CUTOFF_CAPACITY,
@@ -469,23 +472,23 @@ ENERGY_STORAGE_CONFIGURATION_PARAMETERS_1 = [
     rn.STORAGE_WORKING_MODE_SETTINGS,
     rn.STORAGE_CHARGE_FROM_GRID_FUNCTION,
     rn.STORAGE_GRID_CHARGE_CUTOFF_STATE_OF_CHARGE,
-]
+)
 
 # Covers registers 47200 - 47244 (maximum would be 47264)
-ENERGY_STORAGE_CONFIGURATION_PARAMETERS_2 = [
+ENERGY_STORAGE_CONFIGURATION_PARAMETERS_2 = (
     rn.STORAGE_FIXED_CHARGING_AND_DISCHARGING_PERIODS,
     rn.STORAGE_POWER_OF_CHARGE_FROM_GRID,
     rn.STORAGE_MAXIMUM_POWER_OF_CHARGE_FROM_GRID,
-]
+)
 
 # Covers register 47255 - 47299 (maximum would be 47319)
-ENERGY_STORAGE_CONFIGURATION_PARAMETERS_3 = [
+ENERGY_STORAGE_CONFIGURATION_PARAMETERS_3 = (
     rn.STORAGE_TIME_OF_USE_CHARGING_AND_DISCHARGING_PERIODS,
     rn.STORAGE_EXCESS_PV_ENERGY_USE_IN_TOU,
-]
+)
 
-CAPACITY_CONTROL_REGISTERS = [
+CAPACITY_CONTROL_REGISTERS = (
     rn.STORAGE_CAPACITY_CONTROL_MODE,
     rn.STORAGE_CAPACITY_CONTROL_SOC_PEAK_SHAVING,
     rn.STORAGE_CAPACITY_CONTROL_PERIODS,
-]
+)
@@ -3,6 +3,7 @@ Get production and status information from the Huawei Inverter using Modbus over
 """
 import asyncio
 from collections import namedtuple
+import functools
 from hashlib import sha256
 import hmac
 import logging
@@ -14,9 +15,10 @@ import backoff
 from pymodbus.client import AsyncModbusSerialClient, AsyncModbusTcpClient
 from pymodbus.constants import Endian
 from pymodbus.exceptions import ConnectionException as ModbusConnectionException
-from pymodbus.payload import BinaryPayloadBuilder, BinaryPayloadDecoder
+from pymodbus.payload import BinaryPayloadBuilder
 from pymodbus.pdu import ExceptionResponse, ModbusExceptions, ModbusRequest, ModbusResponse
-from pymodbus.utilities import checkCRC, computeCRC
+from pymodbus.register_read_message import ReadHoldingRegistersResponse
+from pymodbus.utilities import computeCRC
 
 import huawei_solar.register_names as rn
 
@@ -31,11 +33,30 @@ from .exceptions import (
     WriteException,
 )
 from .registers import REGISTERS, RegisterDefinition
+from .upload_messages import (
+    CompleteUploadModbusRequest,
+    CompleteUploadModbusResponse,
+    StartUploadModbusRequest,
+    StartUploadModbusResponse,
+    UploadModbusRequest,
+    UploadModbusResponse,
+)
+
+try:
+    from fastcrc import crc16
+except ImportError:  # pragma: no cover
+    crc16 = None
 
 LOGGER = logging.getLogger(__name__)
 
 Result = namedtuple("Result", "value unit")
 
+# `is_read` marks register reads, which the dispatcher can merge
+_QueuedRequest = namedtuple("_QueuedRequest", "func args future is_read")
+
+# how to read and decode a list of registers, with one entry per register in `converters` and `units`
+_ReadPlan = namedtuple("_ReadPlan", "first_register total_length payload_struct converters units")
+
 RECONNECT_DELAY = 1000  # in milliseconds
 
 DEFAULT_TCP_PORT = 502
@@ -46,20 +67,120 @@ DEFAULT_TIMEOUT = 10  # especially the SDongle can react quite slowly
 DEFAULT_WAIT = 1
 DEFAULT_COOLDOWN_TIME = 0.05
 
+REQUEST_QUEUE_SIZE = 64
+
+MAX_REGISTER_GAP = 64
+MAX_READ_LENGTH = 125  # maximum number of registers in one Modbus read request
+
 HEARTBEAT_REGISTER = 49999
 
 FILE_UPLOAD_MAX_RETRIES = 6
+FILE_MAX_PREALLOCATION = 2**20  # in bytes. A file length read from a corrupt frame shouldn't cause a huge allocation
 FILE_UPLOAD_RETRY_TIMEOUT = 10
 
 PERMISSION_DENIED_EXCEPTION_CODE = 0x80
 
+LOGIN_CHALLENGE_LENGTH = 16
+LOGIN_DIGEST_LENGTH = sha256().digest_size
+
+
+def _compute_file_crc(data) -> int:
+    """Computes the CRC-16/MODBUS of a file, in the byte order used by the inverter."""
+    if crc16 is not None:
+        return crc16.modbus(data)
+
+    # computeCRC returns the CRC with its upper and lower byte swapped
+    return int.from_bytes(computeCRC(data).to_bytes(2, "big"), "little")
+
+
+def _read_registers_giveup(details):
+    # the arguments of AsyncHuaweiSolar._do_read_registers are (self, register, length, slave)
+    raise ReadException(f"Failed to read register {details['args'][1]} after {details['tries']} tries")
+
+
+def _file_request_giveup(details):
+    # the arguments of AsyncHuaweiSolar._perform_file_request are (self, request, response_type)
+    raise ReadException(f"Failed to read file {details['args'][1].file_type} after {details['tries']} tries")
+
 
-def _compute_digest(password, seed):
-    hashed_password = sha256(password).digest()
+def _set_future_result(future: asyncio.Future, result):
+    if not future.cancelled():
+        future.set_result(result)
 
+
+def _set_future_exception(future: asyncio.Future, exception: Exception):
+    if not future.done():
+        future.set_exception(exception)
+
+
+def _fail_stopped_request(request: "_QueuedRequest"):
+    _set_future_exception(request.future, ConnectionException("The connection to the inverter was stopped"))
+
+
+def _registers_payload(response: ReadHoldingRegistersResponse) -> bytes:
+    """Returns the bytes of the registers in a read response."""
+    if isinstance(response, RawReadHoldingRegistersResponse):
+        return response.payload
+    return struct.pack(f">{len(response.registers)}H", *response.registers)
+
+
+def _compute_digest(hashed_password, seed):
     return hmac.digest(key=hashed_password, msg=seed, digest=sha256)
 
 
+@functools.lru_cache(maxsize=256)
+def _plan_multiread(names: t.Tuple[str, ...]) -> _ReadPlan:
+    """Validates a list of register names and computes how to read them in one request.
+
+    Returns the first register, the total number of registers to read, a struct that
+    unpacks the raw values of all registers from the response payload at once, and
+    the conversion function and unit of each register. The register definitions are
+    static, so the result can be cached.
+    """
+
+    if len(names) == 0:
+        raise ValueError("Expected at least one register name")
+
+    try:
+        registers = tuple(REGISTERS[name] for name in names)
+    except KeyError as err:
+        raise ValueError(f"Did not recognize register name {err.args[0]}") from err
+
+    for register, register_name in zip(registers, names):
+        if not register.readable:
+            raise ValueError(f"Trying to read unreadable register {register_name}")
+
+    for idx in range(1, len(names)):
+        if registers[idx - 1].register + registers[idx - 1].length > registers[idx].register:
+            raise ValueError(
+                f"Requested registers must be in monotonically increasing order, "
+                f"but {registers[idx-1].register} + {registers[idx-1].length} > {registers[idx].register}!"
+            )
+
+        register_distance = registers[idx - 1].register + registers[idx - 1].length - registers[idx].register
+
+        if register_distance > MAX_REGISTER_GAP:
+            raise ValueError("Gap between requested registers is too large. Split it in two requests")
+
+    total_length = registers[-1].register + registers[-1].length - registers[0].register
+
+    # registers are 16-bit, so we need to multiply by two. Gaps are skipped with pad bytes
+    struct_format = ">" + registers[0].struct_code
+    for idx in range(1, len(registers)):
+        gap = registers[idx].register - registers[idx - 1].register - registers[idx - 1].length
+        if gap:
+            struct_format += f"{gap * 2}x"
+        struct_format += registers[idx].struct_code
+
+    return _ReadPlan(
+        registers[0].register,
+        total_length,
+        struct.Struct(struct_format),
+        tuple(register.convert for register in registers),
+        tuple(register.static_unit for register in registers),
+    )
+
+
 class AsyncHuaweiSolar:
     """Async interface to the Huawei solar inverter"""
 
@@ -72,20 +193,40 @@ class AsyncHuaweiSolar:
     ):
         """DO NOT USE THIS CONSTRUCTOR DIRECTLY. Use AsyncHuaweiSolar.create() instead"""
         self._client = client
+        # The timeout is enforced by the pymodbus client, which wraps every request
+        # in a single asyncio.wait_for(). There is no need to wrap the calls again.
         self._timeout = timeout
         self._cooldown_time = cooldown_time
         self.slave = slave
 
-        # use this lock to prevent concurrent requests, as the
-        # Huawei inverters can't cope with those
-        self._communication_lock = asyncio.Lock()
+        # all requests are queued and executed one by one by a dispatcher task,
+        # as the Huawei inverters can't cope with concurrent requests
+        self._request_queue: asyncio.Queue = asyncio.Queue(maxsize=REQUEST_QUEUE_SIZE)
+        self._dispatcher_task: t.Optional[asyncio.Task] = None
+        self._stopped = False
+        # event loop time at which the last request to the inverter finished
+        self._last_request_time = float("-inf")
 
         # These values are set by the `initialize()` method
         self.time_zone = None
         self.battery_type = None
 
+    @property
+    def time_zone(self) -> t.Optional[int]:
+        """Time zone of the inverter, as an offset from UTC in minutes."""
+        return self._time_zone
+
+    @time_zone.setter
+    def time_zone(self, time_zone: t.Optional[int]):
+        self._time_zone = time_zone
+        # offset in seconds, as needed to decode every timestamp register
+        self.time_zone_offset = None if time_zone is None else 60 * time_zone
+
     async def _initialize(self):
-        # get some registers which are needed to correctly decode all values
+        # get some registers which are needed to correctly decode all values.
+        # The time zone and battery registers are too far apart to be read in one
+        # request, and running them concurrently would not help as requests are
+        # executed one by one anyway.
 
         self.time_zone = (await self.get(rn.TIME_ZONE)).value
         await self._determine_battery_type()
@@ -185,6 +326,7 @@ class AsyncHuaweiSolar:
             timeout=timeout,
         )
         client.register(PrivateHuaweiModbusResponse)
+        client.register(RawReadHoldingRegistersResponse)
         return client
 
     @classmethod
@@ -196,68 +338,203 @@ class AsyncHuaweiSolar:
             reconnect_delay=RECONNECT_DELAY,
         )
         client.register(PrivateHuaweiModbusResponse)
+        client.register(RawReadHoldingRegistersResponse)
         return client
 
     async def stop(self):
         """Stop the modbus client."""
+        self._stopped = True
+
+        if self._dispatcher_task is not None:
+            self._dispatcher_task.cancel()
+            # let the dispatcher fail the requests it is holding
+            await asyncio.wait([self._dispatcher_task])
+
+        self._fail_queued_requests()
+
         await self._client.close()
 
-    async def _decode_response(self, reg: RegisterDefinition, decoder: BinaryPayloadDecoder):
-        """Decodes a modbus register and puts it into a Result object."""
-        result = reg.decode(decoder, self)
+    def _fail_queued_requests(self):
+        while not self._request_queue.empty():
+            _fail_stopped_request(self._request_queue.get_nowait())
 
-        if not hasattr(reg, "unit") or callable(reg.unit) or isinstance(reg.unit, dict):
-            return Result(result, None)
-        return Result(result, reg.unit)
+    async def _execute_exclusively(self, func, *args, is_read=False):
+        """Queues the coroutine function `func` and waits until the dispatcher has executed it."""
+        if self._stopped:
+            raise ConnectionException("The connection to the inverter was stopped")
 
-    async def get(self, name, slave=None):
-        """get named register from device"""
-        return (await self.get_multiple([name], slave))[0]
+        future = asyncio.get_running_loop().create_future()
+        await self._request_queue.put(_QueuedRequest(func, args, future, is_read))
 
-    async def get_multiple(self, names: list[str], slave=None):
-        """Read multiple registers at the same time.
+        if self._stopped:  # stop() was called while waiting for room in the queue
+            self._fail_queued_requests()
+            return await future
 
-        This is only possible if the registers are consecutively available in the
-        inverters' memory.
+        # the dispatcher stops when the queue is empty, so (re)start it when needed
+        if self._dispatcher_task is None or self._dispatcher_task.done():
+            self._dispatcher_task = asyncio.create_task(self._dispatcher())
+
+        return await future
+
+    async def _dispatcher(self):
+        """Executes the queued requests in FIFO order, until the queue is empty.
+
+        Register reads which directly follow each other in the queue are merged
+        into a single read when their registers are close enough to each other.
         """
+        next_request = None
+        try:
+            while next_request is not None or not self._request_queue.empty():
+                await self._wait_for_cooldown()  # throttle requests to prevent errors
+
+                request = next_request or self._request_queue.get_nowait()
+
+                if request.is_read:
+                    reads, next_request = self._take_mergeable_reads(request)
+                    await self._execute_reads(reads)
+                else:
+                    next_request = None
+                    await self._execute_request(request)
+
+                self._update_last_request_time()
+        except asyncio.CancelledError:
+            # stop() cancels the dispatcher. The request it took from the queue can't be retried
+            if next_request is not None:
+                _fail_stopped_request(next_request)
+            raise
+
+    async def _wait_for_cooldown(self):
+        """Waits until the cooldown time has passed since the last request to the inverter."""
+        remaining = self._cooldown_time - (asyncio.get_running_loop().time() - self._last_request_time)
+        if remaining > 0:
+            await asyncio.sleep(remaining)
+
+    def _update_last_request_time(self):
+        self._last_request_time = asyncio.get_running_loop().time()
+
+    def _take_mergeable_reads(self, first_read: "_QueuedRequest"):
+        """Takes the register reads from the queue which can be merged with `first_read`.
+
+        Returns the reads to merge, and the first request from the queue that could not be merged.
+        """
+        register, length, slave = first_read.args
+        start, end = register, register + length
+        slave = slave or self.slave
 
-        if len(names) == 0:
-            raise ValueError("Expected at least one register name")
+        reads = [first_read]
+        while not self._request_queue.empty():
+            request = self._request_queue.get_nowait()
 
-        registers = list(map(REGISTERS.get, names))
+            if not request.is_read or (request.args[2] or self.slave) != slave:
+                return reads, request
 
-        if None in registers:
-            raise ValueError("Did not recognize all register names")
+            register, length, _ = request.args
+            gap = max(register - end, start - (register + length))
+            merged_start, merged_end = min(start, register), max(end, register + length)
 
-        for register, register_name in zip(registers, names):
-            if not register.readable:
-                raise ValueError(f"Trying to read unreadable register {register_name}")
+            if gap > MAX_REGISTER_GAP or merged_end - merged_start > MAX_READ_LENGTH:
+                return reads, request
 
-        for idx in range(1, len(names)):
-            if registers[idx - 1].register + registers[idx - 1].length > registers[idx].register:
-                raise ValueError(
-                    f"Requested registers must be in monotonically increasing order, "
-                    f"but {registers[idx-1].register} + {registers[idx-1].length} > {registers[idx].register}!"
-                )
+            reads.append(request)
+            start, end = merged_start, merged_end
 
-            register_distance = registers[idx - 1].register + registers[idx - 1].length - registers[idx].register
+        return reads, None
 
-            if register_distance > 64:
-                raise ValueError("Gap between requested registers is too large. Split it in two requests")
+    async def _execute_reads(self, reads: list["_QueuedRequest"]):
+        """Executes the given register reads with one read request, and splits the response."""
+        reads = [read for read in reads if not read.future.cancelled()]
 
-        total_length = registers[-1].register + registers[-1].length - registers[0].register
+        if len(reads) <= 1:
+            for read in reads:
+                await self._execute_request(read)
+            return
 
-        response = await self._read_registers(registers[0].register, total_length, slave)
+        start = min(read.args[0] for read in reads)
+        end = max(read.args[0] + read.args[1] for read in reads)
 
-        decoder = BinaryPayloadDecoder.fromRegisters(response.registers, byteorder=Endian.Big, wordorder=Endian.Big)
+        try:
+            response = await self._do_read_registers(start, end - start, reads[0].args[2])
+        except asyncio.CancelledError:
+            for read in reads:
+                _fail_stopped_request(read)
+            raise
+        except ReadException as err:
+            if err.modbus_exception_code is None:
+                for read in reads:
+                    _set_future_exception(read.future, err)
+                return
+
+            # The inverter refused the merged read, ie. because it spans an unsupported register.
+            LOGGER.debug("Merged read of registers %d-%d failed, reading them one by one", start, end - 1)
+            await self._execute_reads_one_by_one(reads)
+            return
+        except Exception as err:  # pylint: disable=broad-except
+            for read in reads:
+                _set_future_exception(read.future, err)
+            return
 
-        result = [await self._decode_response(registers[0], decoder)]
-        for idx in range(1, len(registers)):
-            skip_registers = registers[idx].register - (registers[idx - 1].register + registers[idx - 1].length)
-            decoder.skip_bytes(skip_registers * 2)  # registers are 16-bit, so we need to multiply by two
-            result.append(await self._decode_response(registers[idx], decoder))
+        payload = _registers_payload(response)
+        for read in reads:
+            register, length, _ = read.args
+            offset = (register - start) * 2  # registers are 16-bit
+            _set_future_result(
+                read.future, RawReadHoldingRegistersResponse.from_payload(payload[offset : offset + length * 2])
+            )
+
+    async def _execute_reads_one_by_one(self, reads: list["_QueuedRequest"]):
+        """Executes the given register reads separately, respecting the cooldown time between them."""
+        for i, read in enumerate(reads):
+            try:
+                self._update_last_request_time()
+                await self._wait_for_cooldown()
+                await self._execute_request(read)
+            except asyncio.CancelledError:
+                # fail the reads that were not executed yet, the read in flight may be failed already
+                for pending_read in reads[i:]:
+                    _fail_stopped_request(pending_read)
+                raise
+
+    async def _execute_request(self, request: "_QueuedRequest"):
+        """Executes a queued request and passes its result to the waiting caller."""
+        if request.future.cancelled():  # the caller is no longer interested in the result
+            return
+
+        try:
+            result = await request.func(*request.args)
+        except asyncio.CancelledError:
+            _fail_stopped_request(request)
+            raise
+        except Exception as err:  # pylint: disable=broad-except
+            _set_future_exception(request.future, err)
+        else:
+            _set_future_result(request.future, result)
 
-        return result
+    async def get(self, name, slave=None):
+        """get named register from device"""
+        # single reads are the most common case, so skip building and decoding lists
+        register, length, payload_struct, (convert,), (unit,) = _plan_multiread((name,))
+
+        response = await self._read_registers(register, length, slave)
+
+        (value,) = payload_struct.unpack_from(_registers_payload(response))
+        return Result(convert(value, self), unit)
+
+    async def get_multiple(self, names: t.Sequence[str], slave=None):
+        """Read multiple registers at the same time.
+
+        This is only possible if the registers are consecutively available in the
+        inverters' memory.
+        """
+
+        first_register, total_length, payload_struct, converters, units = _plan_multiread(tuple(names))
+
+        response = await self._read_registers(first_register, total_length, slave)
+
+        data = _registers_payload(response)
+
+        values = payload_struct.unpack_from(data)
+
+        return [Result(convert(value, self), unit) for convert, value, unit in zip(converters, values, units)]
 
     async def _read_registers(self, register: RegisterDefinition, length: int, slave: t.Optional[int]):
         """
@@ -272,147 +549,140 @@ class AsyncHuaweiSolar:
         It seems to only support connections from one device at the same time.
         """
 
-        def backoff_giveup(details):
-            raise ReadException(f"Failed to read register {register} after {details['tries']} tries")
-
-        @backoff.on_exception(
-            backoff.expo,
-            (asyncio.TimeoutError, SlaveBusyException, ConnectionInterruptedException),
-            max_tries=6,
-            jitter=None,
-            on_backoff=lambda details: LOGGER.debug(
-                "Backing off reading for %0.1f seconds after %d tries",
-                details["wait"],
-                details["tries"],
-            ),
-            on_giveup=backoff_giveup,
-        )
-        async def _do_read():
-            if not self._client.connected:
-                message = "Modbus client is not connected to the inverter."
-                LOGGER.exception(message)
-                raise ConnectionInterruptedException(message)
-            try:
-                response = await self._client.read_holding_registers(
-                    register,
-                    length,
-                    slave=slave or self.slave,
-                )
-
-                # trigger a backoff if we get a SlaveBusy-exception
-                if isinstance(response, ExceptionResponse):
-                    if response.exception_code == ModbusExceptions.SlaveBusy:
-                        raise SlaveBusyException()
+        LOGGER.debug("Reading register %s", register)
+        return await self._execute_exclusively(self._do_read_registers, register, length, slave, is_read=True)
+
+    @backoff.on_exception(
+        backoff.expo,
+        (asyncio.TimeoutError, SlaveBusyException, ConnectionInterruptedException),
+        max_tries=6,
+        jitter=None,
+        on_backoff=lambda details: LOGGER.debug(
+            "Backing off reading for %0.1f seconds after %d tries",
+            details["wait"],
+            details["tries"],
+        ),
+        on_giveup=_read_registers_giveup,
+    )
+    async def _do_read_registers(self, register: int, length: int, slave: t.Optional[int]):
+        if not self._client.connected:
+            message = "Modbus client is not connected to the inverter."
+            LOGGER.exception(message)
+            raise ConnectionInterruptedException(message)
+        try:
+            response = await self._client.read_holding_registers(
+                register,
+                length,
+                slave=slave or self.slave,
+            )
 
-                    # Not a slavebusy-exception
-                    raise ReadException(
-                        f"Got error while reading from register {register} with length {length}: {response}",
-                        modbus_exception_code=response.exception_code,
-                    )
+            # trigger a backoff if we get a SlaveBusy-exception
+            if isinstance(response, ExceptionResponse):
+                if response.exception_code == ModbusExceptions.SlaveBusy:
+                    raise SlaveBusyException()
 
-                if len(response.registers) != length:
-                    raise SlaveBusyException(
-                        f"Mismatch between number of requested registers ({length}) "
-                        f"and number of received registers ({len(response.registers)})"
-                    )
+                # Not a slavebusy-exception
+                raise ReadException(
+                    f"Got error while reading from register {register} with length {length}: {response}",
+                    modbus_exception_code=response.exception_code,
+                )
 
-                return response
+            if len(response.registers) != length:
+                raise SlaveBusyException(
+                    f"Mismatch between number of requested registers ({length}) "
+                    f"and number of received registers ({len(response.registers)})"
+                )
 
-            except ModbusConnectionException as err:
-                message = "Could not read register value, has another device interrupted the connection?"
-                LOGGER.error(message)
-                raise ConnectionInterruptedException(message) from err
+            return response
 
-        async with self._communication_lock:
-            LOGGER.debug("Reading register %s", register)
-            result = await _do_read()
-            await asyncio.sleep(self._cooldown_time)  # throttle requests to prevent errors
-            return result
+        except ModbusConnectionException as err:
+            message = "Could not read register value, has another device interrupted the connection?"
+            LOGGER.error(message)
+            raise ConnectionInterruptedException(message) from err
 
     async def get_file(self, file_type, customized_data=None, slave: t.Optional[int] = None) -> bytes:
         """Reads a 'file' as defined by the 'Uploading Files'
         process described in 6.3.7.1 of the
         Solar Inverter Modbus Interface Definitions"""
 
-        def backoff_giveup(details):
-            raise ReadException(f"Failed to read file {file_type} after {details['tries']} tries")
+        LOGGER.debug("Reading file %#x", file_type)
+        return await self._execute_exclusively(self._do_read_file, file_type, customized_data, slave)
 
-        @backoff.on_exception(
-            backoff.constant,
-            (asyncio.TimeoutError, SlaveBusyException),
-            interval=FILE_UPLOAD_RETRY_TIMEOUT,
-            max_tries=FILE_UPLOAD_MAX_RETRIES,
-            jitter=None,
-            on_backoff=lambda details: LOGGER.debug(
-                "Backing off file upload for %0.1f seconds after %d tries",
-                details["wait"],
-                details["tries"],
-            ),
-            on_giveup=backoff_giveup,
+    async def _do_read_file(self, file_type, customized_data: t.Optional[bytes], slave: t.Optional[int]) -> bytes:
+        # Start the upload
+        start_upload_response = await self._perform_file_request(
+            StartUploadModbusRequest(file_type, customized_data, unit=slave or self.slave),
+            StartUploadModbusResponse,
         )
-        async def _perform_request(request: ModbusRequest, response_type):
-            response = await self._client.execute(request)
 
-            if isinstance(response, ExceptionResponse):
-                if response.exception_code == PERMISSION_DENIED_EXCEPTION_CODE:
-                    raise PermissionDenied("Permission denied")
-                if response.exception_code == ModbusExceptions.SlaveBusy:
-                    raise SlaveBusyException()
-                raise ReadException(
-                    f"Exception occured while trying to read file {hex(file_type)}: {hex(response.exception_code)}",
-                    modbus_exception_code=response.exception_code,
-                )
+        data_frame_length = start_upload_response.data_frame_length
+        file_length = start_upload_response.file_length
 
-            return response_type(response.content)
+        # Request the data in 'frames', and copy them into a buffer of the announced file length.
+        # The buffer grows when needed if the preallocation was capped
 
-        async def _do_read_file():
-            # Start the upload
-            start_upload_response = await _perform_request(
-                StartUploadModbusRequest(file_type, customized_data, unit=slave or self.slave),
-                StartUploadModbusResponse,
-            )
+        file_data = bytearray(min(file_length, FILE_MAX_PREALLOCATION))
+        offset = 0
+        next_frame_no = 0
 
-            data_frame_length = start_upload_response.data_frame_length
-            file_length = start_upload_response.file_length
+        while (next_frame_no * data_frame_length) < file_length:
+            data_upload_response = await self._perform_file_request(
+                UploadModbusRequest(file_type, next_frame_no, unit=slave or self.slave),
+                UploadModbusResponse,
+            )
 
-            # Request the data in 'frames'
+            frame_data = data_upload_response.frame_data
+            file_data[offset : offset + len(frame_data)] = frame_data
+            offset += len(frame_data)
+            next_frame_no += 1
 
-            file_data = b""
-            next_frame_no = 0
+        # drop the unused part of the buffer in case the frames were shorter than announced
+        del file_data[offset:]
 
-            while (next_frame_no * data_frame_length) < file_length:
-                data_upload_response = await _perform_request(
-                    UploadModbusRequest(file_type, next_frame_no, unit=slave or self.slave),
-                    UploadModbusResponse,
-                )
+        # Complete the upload and check the CRC
+        complete_upload_response = await self._perform_file_request(
+            CompleteUploadModbusRequest(file_type, unit=slave or self.slave),
+            CompleteUploadModbusResponse,
+        )
 
-                file_data += data_upload_response.frame_data
-                next_frame_no += 1
+        file_crc = complete_upload_response.file_crc
+        computed_crc = _compute_file_crc(file_data)
 
-            # Complete the upload and check the CRC
-            complete_upload_response = await _perform_request(
-                CompleteUploadModbusRequest(file_type, unit=slave or self.slave),
-                CompleteUploadModbusResponse,
+        if computed_crc != file_crc:
+            raise ReadException(
+                f"Computed CRC {computed_crc:x} for file {file_type} does not match expected value {file_crc:x}"
             )
 
-            file_crc = complete_upload_response.file_crc
-            # swap upper and lower two bytes to match how computeCRC works
-            swapped_crc = ((file_crc << 8) & 0xFF00) | ((file_crc >> 8) & 0x00FF)
-
-            if not checkCRC(file_data, swapped_crc):
-                raise ReadException(
-                    f"Computed CRC {computeCRC(file_data):x} for file {file_type} "
-                    f"does not match expected value {swapped_crc}"
-                )
-
-            return file_data
-
-        async with self._communication_lock:
-            LOGGER.debug("Reading file %#x", file_type)
-            result = await _do_read_file()
-            await asyncio.sleep(self._cooldown_time)  # throttle requests to prevent errors
+        return bytes(file_data)
+
+    @backoff.on_exception(
+        backoff.constant,
+        (asyncio.TimeoutError, SlaveBusyException),
+        interval=FILE_UPLOAD_RETRY_TIMEOUT,
+        max_tries=FILE_UPLOAD_MAX_RETRIES,
+        jitter=None,
+        on_backoff=lambda details: LOGGER.debug(
+            "Backing off file upload for %0.1f seconds after %d tries",
+            details["wait"],
+            details["tries"],
+        ),
+        on_giveup=_file_request_giveup,
+    )
+    async def _perform_file_request(self, request: ModbusRequest, response_type):
+        response = await self._client.execute(request)
+
+        if isinstance(response, ExceptionResponse):
+            if response.exception_code == PERMISSION_DENIED_EXCEPTION_CODE:
+                raise PermissionDenied("Permission denied")
+            if response.exception_code == ModbusExceptions.SlaveBusy:
+                raise SlaveBusyException()
+            raise ReadException(
+                f"Exception occured while trying to read file {hex(request.file_type)}: "
+                f"{hex(response.exception_code)}",
+                modbus_exception_code=response.exception_code,
+            )
 
-            return result
+        return response_type(response.content)
 
     async def set(self, name, value, slave=None):
         """set named register from device"""
@@ -447,13 +717,9 @@ class AsyncHuaweiSolar:
             on_giveup=backoff_giveup,
         )
         async def _do_set():
-            return await self._write_registers(reg.register, builder.to_registers(), slave)
+            return await self._write_registers(reg.register, value, slave)
 
-        async with self._communication_lock:
-            result = await _do_set()
-            await asyncio.sleep(self._cooldown_time)  # throttle requests to prevent errors
-
-            return result
+        return await self._execute_exclusively(_do_set)
 
     async def _write_registers(self, register, value, slave=None) -> bool:
         """
@@ -498,6 +764,9 @@ class AsyncHuaweiSolar:
     async def login(self, username: str, password: str, slave: t.Optional[int] = None):
         """Login into the inverter."""
 
+        # the password is only ever used in its hashed form
+        hashed_password = sha256(password.encode("utf-8")).digest()
+
         def backoff_giveup(details):
             raise ReadException(f"Failed to login after {details['tries']} tries")
 
@@ -520,22 +789,21 @@ class AsyncHuaweiSolar:
             challenge_response = await self._client.protocol.execute(challenge_request)
 
             assert challenge_response.content[0] == 0x11
-            inverter_challenge = challenge_response.content[1:17]
+            inverter_challenge = challenge_response.content[1 : 1 + LOGIN_CHALLENGE_LENGTH]
 
-            client_challenge = secrets.token_bytes(16)
+            client_challenge = secrets.token_bytes(LOGIN_CHALLENGE_LENGTH)
 
             encoded_username = username.encode("utf-8")
-            hashed_password = _compute_digest(password.encode("utf-8"), inverter_challenge)
-
-            login_bytes = bytes(
-                [
-                    len(client_challenge) + 1 + len(encoded_username) + 1 + len(hashed_password),
-                    *client_challenge,
-                    len(encoded_username),
-                    *encoded_username,
-                    len(hashed_password),
-                    *hashed_password,
-                ]
+            password_digest = _compute_digest(hashed_password, inverter_challenge)
+
+            login_bytes = struct.pack(
+                f">B{LOGIN_CHALLENGE_LENGTH}sB{len(encoded_username)}sB{LOGIN_DIGEST_LENGTH}s",
+                LOGIN_CHALLENGE_LENGTH + 1 + len(encoded_username) + 1 + LOGIN_DIGEST_LENGTH,
+                client_challenge,
+                len(encoded_username),
+                encoded_username,
+                LOGIN_DIGEST_LENGTH,
+                password_digest,
             )
             await asyncio.sleep(0.05)
             login_request = PrivateHuaweiModbusRequest(37, login_bytes, unit=slave or self.slave)
@@ -547,7 +815,7 @@ class AsyncHuaweiSolar:
 
                 inverter_mac_response = login_response.content[3 : 3 + inverter_mac_response_lengths]
 
-                if not _compute_digest(password.encode("utf-8"), client_challenge) == inverter_mac_response:
+                if not hmac.compare_digest(_compute_digest(hashed_password, client_challenge), inverter_mac_response):
                     LOGGER.error(
                         "Inverter response contains an invalid challenge answer. This could indicate a MitM-attack!"
                     )
@@ -555,12 +823,8 @@ class AsyncHuaweiSolar:
                 return True
             return False
 
-        async with self._communication_lock:
-            LOGGER.debug("Logging in")
-            result = await _do_login()
-            await asyncio.sleep(self._cooldown_time)  # throttle requests to prevent errors
-
-            return result
+        LOGGER.debug("Logging in")
+        return await self._execute_exclusively(_do_login)
 
     async def heartbeat(self, slave_id):
         """Performs the heartbeat command. Only useful when maintaining a session."""
@@ -582,6 +846,32 @@ class AsyncHuaweiSolar:
             return False
 
 
+class RawReadHoldingRegistersResponse(ReadHoldingRegistersResponse):
+    """Read holding registers response which also keeps the received bytes of the registers.
+
+    This allows to decode the register values straight from the received bytes.
+    """
+
+    def __init__(self, values=None, **kwargs):
+        ReadHoldingRegistersResponse.__init__(self, values, **kwargs)
+        self.payload = struct.pack(f">{len(self.registers)}H", *self.registers)
+
+    @classmethod
+    def from_payload(cls, payload: bytes):
+        """Creates a response containing the registers in payload."""
+        response = cls()
+        response._set_payload(payload)  # pylint: disable=protected-access
+        return response
+
+    def decode(self, data):
+        byte_count = int(data[0])
+        self._set_payload(bytes(data[1 : byte_count + 1]))
+
+    def _set_payload(self, payload: bytes):
+        self.payload = payload
+        self.registers = list(struct.unpack(f">{len(payload) // 2}H", payload))
+
+
 class PrivateHuaweiModbusResponse(ModbusResponse):
     """Response with the private Huawei Solar function code"""
 
@@ -592,11 +882,12 @@ class PrivateHuaweiModbusResponse(ModbusResponse):
         ModbusResponse.__init__(self, **kwargs)
 
         self.sub_command = None
-        self.content = b""
+        self.content = memoryview(b"")
 
     def decode(self, data):
         self.sub_command = int(data[0])
-        self.content = data[1:]
+        # a view avoids copying the content, which can be a large file frame
+        self.content = memoryview(data)[1:]
 
     def __str__(self):
         return f"{self.__class__.__name__}({self.sub_command})"
@@ -622,141 +913,3 @@ class PrivateHuaweiModbusRequest(ModbusRequest):
 
     def __str__(self):
         return f"{self.__class__.__name__}({self.sub_command})"
-
-
-class StartUploadModbusRequest(ModbusRequest):
-    """
-    Modbus file upload request
-    """
-
-    function_code = 0x41
-    sub_function_code = 0x05
-
-    def __init__(self, file_type, customized_data: t.Optional[bytes] = None, **kwargs):
-        ModbusRequest.__init__(self, **kwargs)
-        self.file_type = file_type
-
-        if customized_data is None:
-            self.customised_data = b""
-        else:
-            self.customised_data = customized_data
-
-    def encode(self):
-        data_length = 1 + len(self.customised_data)
-        return struct.pack(">BBB", self.sub_function_code, data_length, self.file_type) + self.customised_data
-
-    def decode(self, data):
-        sub_function_code, data_length, self.file_type = struct.unpack(">BBB", data)
-        self.customised_data = data[3:]
-
-        assert sub_function_code == self.sub_function_code
-        assert len(self.customised_data) == data_length - 1
-
-
-class StartUploadModbusResponse(ModbusResponse):  # pylint: disable=too-few-public-methods
-    """
-    Modbus Response to a file upload request
-    """
-
-    function_code = 0x41
-    sub_function_code = 0x05
-
-    def __init__(self, data):
-        ModbusResponse.__init__(self)
-
-        (
-            data_length,
-            self.file_type,
-            self.file_length,
-            self.data_frame_length,
-        ) = struct.unpack_from(">BBLB", data, 0)
-        self.customised_data = data[7:]
-
-        assert len(self.customised_data) == data_length - 6
-
-
-class UploadModbusRequest(ModbusRequest):
-    """
-    Modbus Request for (a part of) a file
-    """
-
-    function_code = 0x41
-    sub_function_code = 0x06
-
-    def __init__(self, file_type, frame_no, **kwargs):
-        ModbusRequest.__init__(self, **kwargs)
-        self.file_type = file_type
-        self.frame_no = frame_no
-
-    def encode(self):
-        data_length = 3
-        return struct.pack(">BBBH", self.sub_function_code, data_length, self.file_type, self.frame_no)
-
-    def decode(self, data):
-        sub_function_code, data_length, self.file_type, self.frame_no = struct.unpack(">BBBH", data)
-
-        assert sub_function_code == self.sub_function_code
-        assert data_length == 3
-
-
-class UploadModbusResponse(ModbusResponse):  # pylint: disable=too-few-public-methods
-    """
-    Modbus Response with (a part of) a file
-    """
-
-    function_code = 0x41
-    sub_function_code = 0x06
-
-    def __init__(self, data):
-        ModbusResponse.__init__(self)
-
-        (
-            data_length,
-            self.file_type,
-            self.frame_no,
-        ) = struct.unpack_from(">BBH", data, 0)
-        self.frame_data = data[4:]
-
-        assert len(self.frame_data) == data_length - 3
-
-
-class CompleteUploadModbusRequest(ModbusRequest):
-    """
-    Modbus Request to complete a file upload
-    """
-
-    function_code = 0x41
-    sub_function_code = 0x0C
-
-    def __init__(self, file_type, **kwargs):
-        ModbusRequest.__init__(self, **kwargs)
-        self.file_type = file_type
-
-    def encode(self):
-        data_length = 1
-        return struct.pack(">BBB", self.sub_function_code, data_length, self.file_type)
-
-    def decode(self, data):
-        sub_function_code, data_length, self.file_type = struct.unpack(">BBB", data)
-
-        assert sub_function_code == self.sub_function_code
-        assert data_length == 1
-
-
-class CompleteUploadModbusResponse(ModbusResponse):  # pylint: disable=too-few-public-methods
-    """
-    Modbus Response when a file upload has been completed
-    """
-
-    function_code = 0x41
-    sub_function_code = 0x0C
-
-    def __init__(self, data):
-        ModbusResponse.__init__(self)
-        (
-            data_length,
-            self.file_type,
-            self.file_crc,
-        ) = struct.unpack_from(">BBH", data, 0)
-
-        assert data_length == 3
@@ -3,11 +3,13 @@
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from enum import IntEnum
-from functools import partial
+from functools import lru_cache, partial
 from inspect import isclass
+import struct
+from types import MappingProxyType
 import typing as t
 
-from pymodbus.payload import BinaryPayloadBuilder, BinaryPayloadDecoder
+from pymodbus.payload import BinaryPayloadBuilder
 
 from huawei_solar.exceptions import (
     DecodeError,
@@ -23,45 +25,122 @@ if t.TYPE_CHECKING:
     # pylint: disable=all
     from .huawei_solar import AsyncHuaweiSolar
 
+_U16 = struct.Struct(">H")
+_I16 = struct.Struct(">h")
+_U32 = struct.Struct(">I")
+_I32 = struct.Struct(">i")
+
+_UTC = timezone.utc
+
 
-@dataclass
 class RegisterDefinition:
     """Base class for register definitions."""
 
+    __slots__ = ("register", "length", "writeable", "readable", "static_unit")
+
     def __init__(self, register, length, writeable=False, readable=True):
         self.register = register
         self.length = length
         self.writeable = writeable
         self.readable = readable
 
+        # unit to report alongside the decoded value
+        self.static_unit = None
+
+    @property
+    def struct_code(self) -> str:
+        """Struct format code of the raw value, by default the bytes of the register."""
+        return f"{self.length * 2}s"
+
     def encode(self, data, builder: BinaryPayloadBuilder):
         raise NotImplementedError()
 
-    def decode(self, decoder: BinaryPayloadDecoder, inverter: "AsyncHuaweiSolar"):
+    def decode(self, data: bytes, offset: int, inverter: "AsyncHuaweiSolar"):
+        """Decodes the value of this register, which starts at `offset` bytes in `data`.
+
+        `data` can be any buffer, such as a memoryview on the received payload.
+        """
         raise NotImplementedError()
 
+    def convert(self, value, inverter: "AsyncHuaweiSolar"):
+        """Converts the raw value, as unpacked with `struct_code`, into the decoded value."""
+        return self.decode(value, 0, inverter)
+
 
 class StringRegister(RegisterDefinition):
     """A string register."""
 
-    def decode(self, decoder: BinaryPayloadDecoder, inverter: "AsyncHuaweiSolar"):
+    __slots__ = ()
+
+    def decode(self, data: bytes, offset: int, inverter: "AsyncHuaweiSolar"):
         try:
-            return decoder.decode_string(self.length * 2).decode("utf-8").strip("\0")
+            # strip the padding before decoding, so that only one string is created.
+            # bytes() doesn't copy the data if it already is the bytes of this register
+            return bytes(data[offset : offset + self.length * 2]).strip(b"\0").decode("utf-8")
         except UnicodeDecodeError as err:
             raise DecodeError from err
 
 
+# conversions for the gains in use, with the gain as a constant rather than a closure variable.
+# Dividing keeps the results identical to `value / gain`, which multiplying by 1 / gain would not
+_GAIN_CONVERTERS: dict[int, t.Callable[[int], t.Any]] = {
+    1: lambda value: value,
+    10: lambda value: value / 10,
+    100: lambda value: value / 100,
+    1000: lambda value: value / 1000,
+}
+
+
+def _value_converter(unit, gain) -> t.Callable[[int], t.Any]:
+    """Returns a function that applies the gain and the unit of a number register to a raw value."""
+    if callable(unit):
+        lookup, lookup_error = unit, ValueError
+    elif isinstance(unit, dict):
+        lookup, lookup_error = unit.__getitem__, KeyError
+    elif gain in _GAIN_CONVERTERS:
+        return _GAIN_CONVERTERS[gain]
+    else:
+        return lambda value: value / gain
+
+    if gain == 1:
+
+        def _convert(value):
+            try:
+                return lookup(value)
+            except lookup_error as err:
+                raise DecodeError from err
+
+    else:
+
+        def _convert(value):
+            try:
+                return lookup(value / gain)
+            except lookup_error as err:
+                raise DecodeError from err
+
+    return _convert
+
+
+# registers with the same unit and gain share their conversion function. Dict units aren't hashable
+_shared_value_converter = lru_cache(maxsize=None)(_value_converter)
+
+
 class NumberRegister(RegisterDefinition):
     """Base class for number registers."""
 
+    __slots__ = ("unit", "gain", "_convert", "_invalid_value")
+
+    # set by the subclasses for their number type
+    struct_code: str
+    _unpack: t.Callable[[bytes, int], t.Tuple[int]]
+    _encode: t.Callable[[BinaryPayloadBuilder, int], None]
+
     def __init__(
         self,
         unit,
         gain,
         register,
         length,
-        decode_function_name,
-        encode_function_name,
         writeable=False,
         readable=True,
         invalid_value=None,
@@ -70,30 +149,25 @@ class NumberRegister(RegisterDefinition):
         self.unit = unit
         self.gain = gain
 
-        self._decode_function_name = decode_function_name
-        self._encode_function_name = encode_function_name
+        # a callable or dict unit is only used to convert the value
+        self.static_unit = None if callable(unit) or isinstance(unit, dict) else unit
+
+        if isinstance(unit, dict):
+            self._convert = _value_converter(unit, gain)
+        else:
+            # a plain unit doesn't affect the conversion, so all of them can share it
+            self._convert = _shared_value_converter(unit if callable(unit) else None, gain)
         self._invalid_value = invalid_value
 
-    def decode(self, decoder: BinaryPayloadDecoder, inverter: "AsyncHuaweiSolar"):
-        result = getattr(decoder, self._decode_function_name)()
+    def decode(self, data: bytes, offset: int, inverter: "AsyncHuaweiSolar"):
+        (result,) = self._unpack(data, offset)
+        return self.convert(result, inverter)
 
-        if self._invalid_value is not None and result == self._invalid_value:
+    def convert(self, value, inverter: "AsyncHuaweiSolar"):
+        if value == self._invalid_value:
             return None
 
-        if self.gain != 1:
-            result /= self.gain
-        if callable(self.unit):
-            try:
-                result = self.unit(result)
-            except ValueError as err:
-                raise DecodeError from err
-        elif isinstance(self.unit, dict):
-            try:
-                result = self.unit[result]
-            except KeyError as err:
-                raise DecodeError from err
-
-        return result
+        return self._convert(value)
 
     def encode(self, data, builder: BinaryPayloadBuilder):
         if self.unit == bool:
@@ -112,20 +186,24 @@ class NumberRegister(RegisterDefinition):
 
         data = int(data)  # it should always be an int!
 
-        getattr(builder, self._encode_function_name)(data)
+        self._encode(builder, data)
 
 
 class U16Register(NumberRegister):
     """Unsigned 16-bit register"""
 
+    __slots__ = ()
+
+    struct_code = _U16.format[1:]
+    _unpack = _U16.unpack_from
+    _encode = staticmethod(BinaryPayloadBuilder.add_16bit_uint)
+
     def __init__(self, unit, gain, register, length, writeable=False, readable=True, ignore_invalid=False):
         super().__init__(
             unit,
             gain,
             register,
             length,
-            "decode_16bit_uint",
-            "add_16bit_uint",
             writeable=writeable,
             readable=readable,
             invalid_value=2**16 - 1 if not ignore_invalid else None,
@@ -135,14 +213,18 @@ class U16Register(NumberRegister):
 class U32Register(NumberRegister):
     """Unsigned 32-bit register"""
 
+    __slots__ = ()
+
+    struct_code = _U32.format[1:]
+    _unpack = _U32.unpack_from
+    _encode = staticmethod(BinaryPayloadBuilder.add_32bit_uint)
+
     def __init__(self, unit, gain, register, length, writeable=False):
         super().__init__(
             unit,
             gain,
             register,
             length,
-            "decode_32bit_uint",
-            "add_32bit_uint",
             writeable=writeable,
             invalid_value=2**32 - 1,
         )
@@ -151,14 +233,18 @@ class U32Register(NumberRegister):
 class I16Register(NumberRegister):
     """Signed 16-bit register"""
 
+    __slots__ = ()
+
+    struct_code = _I16.format[1:]
+    _unpack = _I16.unpack_from
+    _encode = staticmethod(BinaryPayloadBuilder.add_16bit_int)
+
     def __init__(self, unit, gain, register, length, writeable=False):
         super().__init__(
             unit,
             gain,
             register,
             length,
-            "decode_16bit_int",
-            "add_16bit_int",
             writeable=writeable,
             invalid_value=2**15 - 1,
         )
@@ -167,14 +253,18 @@ class I16Register(NumberRegister):
 class I32Register(NumberRegister):
     """Signed 32-bit register."""
 
+    __slots__ = ()
+
+    struct_code = _I32.format[1:]
+    _unpack = _I32.unpack_from
+    _encode = staticmethod(BinaryPayloadBuilder.add_32bit_int)
+
     def __init__(self, unit, gain, register, length, writeable=False):
         super().__init__(
             unit,
             gain,
             register,
             length,
-            "decode_32bit_int",
-            "add_32bit_int",
             writeable=writeable,
             invalid_value=2**31 - 1,
         )
@@ -191,20 +281,24 @@ class I32AbsoluteValueRegister(NumberRegister):
 
     """
 
+    __slots__ = ()
+
+    struct_code = _I32.format[1:]
+    _unpack = _I32.unpack_from
+    _encode = staticmethod(BinaryPayloadBuilder.add_32bit_int)
+
     def __init__(self, unit, gain, register, length, writeable=False):
         super().__init__(
             unit,
             gain,
             register,
             length,
-            "decode_32bit_int",
-            "add_32bit_int",
             writeable=writeable,
             invalid_value=2**31 - 1,
         )
 
-    def decode(self, decoder: BinaryPayloadDecoder, inverter: "AsyncHuaweiSolar"):
-        value = super().decode(decoder, inverter)
+    def convert(self, value, inverter: "AsyncHuaweiSolar"):
+        value = super().convert(value, inverter)
         if value is not None:
             return abs(value)
         else:
@@ -223,26 +317,59 @@ def bitfield_decoder(definition, bitfield):
     return result
 
 
+def make_bitfield_decoder(definition):
+    """Returns a function that decodes a bitfield into a list of statuses.
+
+    When every status is a single bit in ascending order, only the bits that are
+    set are visited. Otherwise, this falls back to bitfield_decoder.
+    """
+    keys = list(definition)
+    if (
+        keys != sorted(keys)
+        or any(key & (key - 1) for key in keys)
+        or any(isinstance(value, rv.OnOffBit) for value in definition.values())
+    ):
+        return partial(bitfield_decoder, definition)
+
+    by_mask = dict(definition)
+
+    def _decode(bitfield):
+        result = []
+        while bitfield:
+            lowest_bit = bitfield & -bitfield
+            status = by_mask.get(lowest_bit)
+            if status is not None:
+                result.append(status)
+            bitfield ^= lowest_bit
+        return result
+
+    return _decode
+
+
 class TimestampRegister(U32Register):
     """Timestamp register."""
 
+    __slots__ = ()
+
     def __init__(self, register, length, writeable=False):
         super().__init__(None, 1, register, length, writeable=writeable)
 
-    def decode(self, decoder: BinaryPayloadDecoder, inverter: "AsyncHuaweiSolar"):
-        value = super().decode(decoder, inverter)
+    def convert(self, value, inverter: "AsyncHuaweiSolar"):
+        value = super().convert(value, inverter)
 
         if value is None:
             return None
 
         try:
-            return datetime.fromtimestamp(value - 60 * inverter.time_zone, timezone.utc)
+            return datetime.fromtimestamp(value - inverter.time_zone_offset, _UTC)
         except OverflowError as err:
             raise DecodeError(f"Received invalid timestamp {value}") from err
 
 
 @dataclass
 class LG_RESU_TimeOfUsePeriod:  # pylint: disable=invalid-name
+    __slots__ = ("start_time", "end_time", "electricity_price")
+
     start_time: int  # minutes sinds midnight
     end_time: int  # minutes sinds midnight
     electricity_price: float
@@ -253,8 +380,21 @@ class ChargeFlag(IntEnum):
     DISCHARGE = 1
 
 
+# ChargeFlag members indexed by their value, which is faster than calling ChargeFlag(value)
+_CHARGE_FLAGS = tuple(sorted(ChargeFlag))
+
+
+def _charge_flag(value: int) -> ChargeFlag:
+    try:
+        return _CHARGE_FLAGS[value]
+    except IndexError as err:
+        raise DecodeError(f"Invalid charge flag {value}") from err
+
+
 @dataclass
 class HUAWEI_LUNA2000_TimeOfUsePeriod:  # pylint: disable=invalid-name
+    __slots__ = ("start_time", "end_time", "charge_flag", "days_effective")
+
     start_time: int  # minutes since midnight
     end_time: int  # minutes since midnight
     charge_flag: ChargeFlag
@@ -264,30 +404,42 @@ class HUAWEI_LUNA2000_TimeOfUsePeriod:  # pylint: disable=invalid-name
 LG_RESU_TOU_PERIODS = 10
 HUAWEI_LUNA2000_TOU_PERIODS = 14
 
+# days_effective tuple for each possible value of the 7 day bits, from Sunday to Saturday
+_DAYS_EFFECTIVE = tuple(tuple((value >> day) & 1 == 1 for day in range(7)) for value in range(2**7))
+
+
+def _unpack_periods(period_struct: struct.Struct, data: bytes, offset: int, count: int):
+    """Unpacks `count` consecutive periods, which start at `offset` bytes in `data`, in one go."""
+    return period_struct.iter_unpack(memoryview(data)[offset : offset + count * period_struct.size])
+
+
+# layout of a single period: start time, end time and electricity price
+_LG_RESU_PERIOD = struct.Struct(">HHI")
+# layout of a single period: start time, end time, charge flag and effective days
+_HUAWEI_LUNA2000_PERIOD = struct.Struct(">HHBB")
+
 
 class TimeOfUseRegisters(RegisterDefinition):
-    def decode(self, decoder: BinaryPayloadDecoder, inverter: "AsyncHuaweiSolar"):
-        if inverter.battery_type == rv.StorageProductModel.LG_RESU:
-            return self.decode_lg_resu(decoder)
-        elif inverter.battery_type == rv.StorageProductModel.HUAWEI_LUNA2000:
-            return self.decode_huawei_luna2000(decoder)
-        raise DecodeError(f"Invalid model to decode TOU Registers for: {inverter.battery_type}")
-
-    def decode_lg_resu(self, decoder: BinaryPayloadDecoder) -> list[LG_RESU_TimeOfUsePeriod]:
-        number_of_periods = decoder.decode_16bit_uint()
+    __slots__ = ()
+
+    def decode(self, data: bytes, offset: int, inverter: "AsyncHuaweiSolar"):
+        decode_periods = self._PERIOD_DECODERS.get(inverter.battery_type)
+        if decode_periods is None:
+            raise DecodeError(f"Invalid model to decode TOU Registers for: {inverter.battery_type}")
+        return decode_periods(self, data, offset)
+
+    def decode_lg_resu(self, data: bytes, offset: int) -> list[LG_RESU_TimeOfUsePeriod]:
+        (number_of_periods,) = _U16.unpack_from(data, offset)
         assert number_of_periods <= LG_RESU_TOU_PERIODS
 
-        periods = []
-        for _ in range(LG_RESU_TOU_PERIODS):
-            periods.append(
-                LG_RESU_TimeOfUsePeriod(
-                    decoder.decode_16bit_uint(),
-                    decoder.decode_16bit_uint(),
-                    decoder.decode_32bit_uint() / 1000,
-                )
+        periods = [
+            LG_RESU_TimeOfUsePeriod(start_time, end_time, electricity_price / 1000)
+            for start_time, end_time, electricity_price in _unpack_periods(
+                _LG_RESU_PERIOD, data, offset + 2, number_of_periods
             )
+        ]
 
-        return periods[:number_of_periods]
+        return periods
 
     def _validate(self, data: t.Union[list[HUAWEI_LUNA2000_TimeOfUsePeriod], list[LG_RESU_TimeOfUsePeriod]]):
         # validate data type
@@ -380,31 +532,20 @@ class TimeOfUseRegisters(RegisterDefinition):
             builder.add_16bit_uint(0)
             builder.add_32bit_uint(0)
 
-    def decode_huawei_luna2000(self, decoder: BinaryPayloadDecoder) -> list[HUAWEI_LUNA2000_TimeOfUsePeriod]:
-        number_of_periods = decoder.decode_16bit_uint()
+    def decode_huawei_luna2000(self, data: bytes, offset: int) -> list[HUAWEI_LUNA2000_TimeOfUsePeriod]:
+        (number_of_periods,) = _U16.unpack_from(data, offset)
         assert number_of_periods <= HUAWEI_LUNA2000_TOU_PERIODS
 
-        def _days_effective_parser(value):
-            result = []
-            mask = 0x1
-            for _ in range(7):
-                result.append((value & mask) != 0)
-                mask = mask << 1
-
-            return tuple(result)
-
-        periods = []
-        for _ in range(HUAWEI_LUNA2000_TOU_PERIODS):
-            periods.append(
-                HUAWEI_LUNA2000_TimeOfUsePeriod(
-                    decoder.decode_16bit_uint(),
-                    decoder.decode_16bit_uint(),
-                    ChargeFlag(decoder.decode_8bit_uint()),
-                    _days_effective_parser(decoder.decode_8bit_uint()),
-                )
+        periods = [
+            HUAWEI_LUNA2000_TimeOfUsePeriod(
+                start_time, end_time, _charge_flag(charge_flag), _DAYS_EFFECTIVE[days_effective & 0x7F]
+            )
+            for start_time, end_time, charge_flag, days_effective in _unpack_periods(
+                _HUAWEI_LUNA2000_PERIOD, data, offset + 2, number_of_periods
             )
+        ]
 
-        return periods[:number_of_periods]
+        return periods
 
     def encode_huawei_luna2000(self, data: list[HUAWEI_LUNA2000_TimeOfUsePeriod], builder: BinaryPayloadBuilder):
         assert len(data) <= HUAWEI_LUNA2000_TOU_PERIODS
@@ -432,9 +573,17 @@ class TimeOfUseRegisters(RegisterDefinition):
             builder.add_16bit_uint(0)
             builder.add_16bit_uint(0)
 
+    # period decoder to use for each battery model
+    _PERIOD_DECODERS = {
+        rv.StorageProductModel.LG_RESU: decode_lg_resu,
+        rv.StorageProductModel.HUAWEI_LUNA2000: decode_huawei_luna2000,
+    }
+
 
 @dataclass
 class ChargeDischargePeriod:
+    __slots__ = ("start_time", "end_time", "power")
+
     start_time: int  # minutes sinds midnight
     end_time: int  # minutes sinds midnight
     power: int  # power in watts
@@ -442,23 +591,23 @@ class ChargeDischargePeriod:
 
 CHARGE_DISCHARGE_PERIODS = 10
 
+# layout of a single period: start time, end time and power
+_CHARGE_DISCHARGE_PERIOD = struct.Struct(">HHi")
+
 
 class ChargeDischargePeriodRegisters(RegisterDefinition):
-    def decode(self, decoder: BinaryPayloadDecoder, inverter: "AsyncHuaweiSolar") -> list[ChargeDischargePeriod]:
-        number_of_periods = decoder.decode_16bit_uint()
+    __slots__ = ()
+
+    def decode(self, data: bytes, offset: int, inverter: "AsyncHuaweiSolar") -> list[ChargeDischargePeriod]:
+        (number_of_periods,) = _U16.unpack_from(data, offset)
         assert number_of_periods <= CHARGE_DISCHARGE_PERIODS
 
-        periods = []
-        for _ in range(10):
-            periods.append(
-                ChargeDischargePeriod(
-                    decoder.decode_16bit_uint(),
-                    decoder.decode_16bit_uint(),
-                    decoder.decode_32bit_int(),
-                )
-            )
+        periods = [
+            ChargeDischargePeriod(*period)
+            for period in _unpack_periods(_CHARGE_DISCHARGE_PERIOD, data, offset + 2, number_of_periods)
+        ]
 
-        return periods[:number_of_periods]
+        return periods
 
     def encode(self, data: list[ChargeDischargePeriod], builder: BinaryPayloadBuilder):
         assert len(data) <= CHARGE_DISCHARGE_PERIODS
@@ -478,6 +627,8 @@ class ChargeDischargePeriodRegisters(RegisterDefinition):
 
 @dataclass
 class PeakSettingPeriod:
+    __slots__ = ("start_time", "end_time", "power", "days_effective")
+
     start_time: int  # minutes sinds midnight
     end_time: int  # minutes sinds midnight
     power: int  # power in watts
@@ -486,6 +637,9 @@ class PeakSettingPeriod:
 
 PEAK_SETTING_PERIODS = 14
 
+# layout of a single period: start time, end time, power and effective days
+_PEAK_SETTING_PERIOD = struct.Struct(">HHiB")
+
 
 def _days_effective_builder(days_tuple):
     result = 0
@@ -498,37 +652,24 @@ def _days_effective_builder(days_tuple):
     return result
 
 
-def _days_effective_parser(value):
-    result = []
-    mask = 0x1
-    for _ in range(7):
-        result.append((value & mask) != 0)
-        mask = mask << 1
-
-    return tuple(result)
-
-
 class PeakSettingPeriodRegisters(RegisterDefinition):
-    def decode(self, decoder: BinaryPayloadDecoder, inverter: "AsyncHuaweiSolar") -> list[PeakSettingPeriod]:
-        number_of_periods = decoder.decode_16bit_uint()
+    __slots__ = ()
+
+    def decode(self, data: bytes, offset: int, inverter: "AsyncHuaweiSolar") -> list[PeakSettingPeriod]:
+        (number_of_periods,) = _U16.unpack_from(data, offset)
 
         # Safety check
         if number_of_periods > PEAK_SETTING_PERIODS:
             number_of_periods = PEAK_SETTING_PERIODS
 
         periods = []
-        for _ in range(number_of_periods):
-            start_time, end_time, peak_value, week_value = (
-                decoder.decode_16bit_uint(),
-                decoder.decode_16bit_uint(),
-                decoder.decode_32bit_int(),
-                decoder.decode_8bit_uint(),
-            )
-
+        for start_time, end_time, peak_value, week_value in _unpack_periods(
+            _PEAK_SETTING_PERIOD, data, offset + 2, number_of_periods
+        ):
             if start_time != end_time and week_value != 0:
-                periods.append(PeakSettingPeriod(start_time, end_time, peak_value, _days_effective_parser(week_value)))
+                periods.append(PeakSettingPeriod(start_time, end_time, peak_value, _DAYS_EFFECTIVE[week_value & 0x7F]))
 
-        return periods[:number_of_periods]
+        return periods
 
     def _validate(self, data: list[PeakSettingPeriod]):
         for day_idx in range(0, 7):
@@ -576,7 +717,7 @@ class PeakSettingPeriodRegisters(RegisterDefinition):
             builder.add_8bit_uint(0)
 
 
-REGISTERS: dict[str, RegisterDefinition] = {
+BASE_REGISTERS: dict[str, RegisterDefinition] = {
     rn.FIXED_ACTIVE_POWER: U32Register("W", 1, 40126, 2, writeable=True),
     rn.MODEL_NAME: StringRegister(30000, 15),
     rn.SERIAL_NUMBER: StringRegister(30015, 10),
@@ -589,12 +730,12 @@ REGISTERS: dict[str, RegisterDefinition] = {
     rn.S_MAX: U32Register("VA", 1, 30077, 2),
     rn.Q_MAX_OUT: I32Register("VAr", 1, 30079, 2),
     rn.Q_MAX_IN: I32Register("VAr", 1, 30081, 2),
-    rn.STATE_1: U16Register(partial(bitfield_decoder, rv.STATE_CODES_1), 1, 32000, 1),
-    rn.STATE_2: U16Register(partial(bitfield_decoder, rv.STATE_CODES_2), 1, 32002, 1),
-    rn.STATE_3: U32Register(partial(bitfield_decoder, rv.STATE_CODES_3), 1, 32003, 2),
-    rn.ALARM_1: U16Register(partial(bitfield_decoder, rv.ALARM_CODES_1), 1, 32008, 1, ignore_invalid=True),
-    rn.ALARM_2: U16Register(partial(bitfield_decoder, rv.ALARM_CODES_2), 1, 32009, 1, ignore_invalid=True),
-    rn.ALARM_3: U16Register(partial(bitfield_decoder, rv.ALARM_CODES_3), 1, 32010, 1),
+    rn.STATE_1: U16Register(make_bitfield_decoder(rv.STATE_CODES_1), 1, 32000, 1),
+    rn.STATE_2: U16Register(make_bitfield_decoder(rv.STATE_CODES_2), 1, 32002, 1),
+    rn.STATE_3: U32Register(make_bitfield_decoder(rv.STATE_CODES_3), 1, 32003, 2),
+    rn.ALARM_1: U16Register(make_bitfield_decoder(rv.ALARM_CODES_1), 1, 32008, 1, ignore_invalid=True),
+    rn.ALARM_2: U16Register(make_bitfield_decoder(rv.ALARM_CODES_2), 1, 32009, 1, ignore_invalid=True),
+    rn.ALARM_3: U16Register(make_bitfield_decoder(rv.ALARM_CODES_3), 1, 32010, 1),
     rn.INPUT_POWER: I32Register("W", 1, 32064, 2),
     rn.GRID_VOLTAGE: U16Register("V", 10, 32066, 1),
     rn.LINE_VOLTAGE_A_B: U16Register("V", 10, 32066, 1),
@@ -692,8 +833,6 @@ PV_REGISTERS = {
     rn.PV_24_CURRENT: I16Register("A", 100, 32063, 1),
 }
 
-REGISTERS.update(PV_REGISTERS)
-
 BATTERY_REGISTERS = {
     rn.STORAGE_UNIT_1_RUNNING_STATUS: U16Register(rv.StorageStatus, 1, 37000, 1),
     rn.STORAGE_UNIT_1_CHARGE_DISCHARGE_POWER: I32Register("W", 1, 37001, 2),
@@ -850,7 +989,6 @@ BATTERY_REGISTERS = {
     rn.STORAGE_UNIT_2_PACK_2_NO: U16Register(None, 1, 47754, 1),
     rn.STORAGE_UNIT_2_PACK_3_NO: U16Register(None, 1, 47755, 1),
 }
-REGISTERS.update(BATTERY_REGISTERS)
 
 CAPACITY_CONTROL_REGISTERS = {
     # We must check if we can read from these registers to know if this feature is supported
@@ -860,8 +998,6 @@ CAPACITY_CONTROL_REGISTERS = {
     rn.STORAGE_CAPACITY_CONTROL_PERIODS: PeakSettingPeriodRegisters(47956, 64, writeable=True),
 }
 
-REGISTERS.update(CAPACITY_CONTROL_REGISTERS)
-
 METER_REGISTERS = {
     rn.METER_STATUS: U16Register(rv.MeterStatus, 1, 37100, 1),
     rn.GRID_A_VOLTAGE: I32Register("V", 10, 37101, 2),
@@ -888,4 +1024,12 @@ METER_REGISTERS = {
     rn.METER_TYPE_CHECK: U16Register(rv.MeterTypeCheck, 1, 37125, 2),
 }
 
-REGISTERS.update(METER_REGISTERS)
+REGISTERS: t.Mapping[str, RegisterDefinition] = MappingProxyType(
+    {
+        **BASE_REGISTERS,
+        **PV_REGISTERS,
+        **BATTERY_REGISTERS,
+        **CAPACITY_CONTROL_REGISTERS,
+        **METER_REGISTERS,
+    }
+)
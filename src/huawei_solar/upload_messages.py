@@ -0,0 +1,152 @@
+"""Modbus messages of the Huawei file upload procedure"""
+import struct
+import typing as t
+
+from pymodbus.pdu import ModbusRequest, ModbusResponse
+
+# Precompiled layouts of the file upload messages. These are used for every frame of a file.
+_START_UPLOAD_REQUEST = struct.Struct(">BBB")
+_START_UPLOAD_RESPONSE = struct.Struct(">BBLB")
+_UPLOAD_REQUEST = struct.Struct(">BBBH")
+_UPLOAD_RESPONSE = struct.Struct(">BBH")
+_COMPLETE_UPLOAD_REQUEST = struct.Struct(">BBB")
+_COMPLETE_UPLOAD_RESPONSE = struct.Struct(">BBH")
+
+
+class StartUploadModbusRequest(ModbusRequest):
+    """
+    Modbus file upload request
+    """
+
+    function_code = 0x41
+    sub_function_code = 0x05
+
+    def __init__(self, file_type, customized_data: t.Optional[bytes] = None, **kwargs):
+        ModbusRequest.__init__(self, **kwargs)
+        self.file_type = file_type
+
+        if customized_data is None:
+            self.customised_data = b""
+        else:
+            self.customised_data = customized_data
+
+    def encode(self):
+        data_length = 1 + len(self.customised_data)
+        return _START_UPLOAD_REQUEST.pack(self.sub_function_code, data_length, self.file_type) + self.customised_data
+
+    def decode(self, data):
+        sub_function_code, data_length, self.file_type = _START_UPLOAD_REQUEST.unpack_from(data, 0)
+        self.customised_data = data[3:]
+
+        assert sub_function_code == self.sub_function_code
+        assert len(self.customised_data) == data_length - 1
+
+
+class StartUploadModbusResponse(ModbusResponse):  # pylint: disable=too-few-public-methods
+    """
+    Modbus Response to a file upload request
+    """
+
+    function_code = 0x41
+    sub_function_code = 0x05
+
+    def __init__(self, data):
+        ModbusResponse.__init__(self)
+
+        (
+            data_length,
+            self.file_type,
+            self.file_length,
+            self.data_frame_length,
+        ) = _START_UPLOAD_RESPONSE.unpack_from(data, 0)
+        self.customised_data = bytes(data[7:])
+
+        assert len(self.customised_data) == data_length - 6
+
+
+class UploadModbusRequest(ModbusRequest):
+    """
+    Modbus Request for (a part of) a file
+    """
+
+    function_code = 0x41
+    sub_function_code = 0x06
+
+    def __init__(self, file_type, frame_no, **kwargs):
+        ModbusRequest.__init__(self, **kwargs)
+        self.file_type = file_type
+        self.frame_no = frame_no
+
+    def encode(self):
+        data_length = 3
+        return _UPLOAD_REQUEST.pack(self.sub_function_code, data_length, self.file_type, self.frame_no)
+
+    def decode(self, data):
+        sub_function_code, data_length, self.file_type, self.frame_no = _UPLOAD_REQUEST.unpack(data)
+
+        assert sub_function_code == self.sub_function_code
+        assert data_length == 3
+
+
+class UploadModbusResponse(ModbusResponse):  # pylint: disable=too-few-public-methods
+    """
+    Modbus Response with (a part of) a file
+    """
+
+    function_code = 0x41
+    sub_function_code = 0x06
+
+    def __init__(self, data):
+        ModbusResponse.__init__(self)
+
+        (
+            data_length,
+            self.file_type,
+            self.frame_no,
+        ) = _UPLOAD_RESPONSE.unpack_from(data, 0)
+        # when data is a memoryview, this is a view as well: the frame is only copied into the file buffer
+        self.frame_data = data[4:]
+
+        assert len(self.frame_data) == data_length - 3
+
+
+class CompleteUploadModbusRequest(ModbusRequest):
+    """
+    Modbus Request to complete a file upload
+    """
+
+    function_code = 0x41
+    sub_function_code = 0x0C
+
+    def __init__(self, file_type, **kwargs):
+        ModbusRequest.__init__(self, **kwargs)
+        self.file_type = file_type
+
+    def encode(self):
+        data_length = 1
+        return _COMPLETE_UPLOAD_REQUEST.pack(self.sub_function_code, data_length, self.file_type)
+
+    def decode(self, data):
+        sub_function_code, data_length, self.file_type = _COMPLETE_UPLOAD_REQUEST.unpack(data)
+
+        assert sub_function_code == self.sub_function_code
+        assert data_length == 1
+
+
+class CompleteUploadModbusResponse(ModbusResponse):  # pylint: disable=too-few-public-methods
+    """
+    Modbus Response when a file upload has been completed
+    """
+
+    function_code = 0x41
+    sub_function_code = 0x0C
+
+    def __init__(self, data):
+        ModbusResponse.__init__(self)
+        (
+            data_length,
+            self.file_type,
+            self.file_crc,
+        ) = _COMPLETE_UPLOAD_RESPONSE.unpack_from(data, 0)
+
+        assert data_length == 3
@@ -1,10 +1,14 @@
+import struct
 from unittest.mock import MagicMock
 
+from pymodbus.constants import Endian
+from pymodbus.payload import BinaryPayloadBuilder
 import pytest
 
-from huawei_solar.exceptions import TimeOfUsePeriodsException
+from huawei_solar.exceptions import DecodeError, TimeOfUsePeriodsException
 import huawei_solar.register_names as rn
-from huawei_solar.registers import REGISTERS, HUAWEI_LUNA2000_TimeOfUsePeriod, LG_RESU_TimeOfUsePeriod
+import huawei_solar.register_values as rv
+from huawei_solar.registers import REGISTERS, ChargeFlag, HUAWEI_LUNA2000_TimeOfUsePeriod, LG_RESU_TimeOfUsePeriod
 
 ppr = REGISTERS[rn.STORAGE_TIME_OF_USE_CHARGING_AND_DISCHARGING_PERIODS]
 
@@ -158,3 +162,37 @@ def test__validate__tou_periods__different_types():
 
 def test__validate__data_type__none():
     ppr._validate([])
+
+
+def _encode(periods):
+    builder = BinaryPayloadBuilder(byteorder=Endian.Big, wordorder=Endian.Big)
+    ppr.encode(periods, builder)
+    return builder.to_string()
+
+
+def test__decode__tou_periods__HUAWEI_LUNA2000():
+    tou = [
+        HUAWEI_LUNA2000_TimeOfUsePeriod(0, 120, ChargeFlag.CHARGE, (True, True, True, True, True, True, True)),
+        HUAWEI_LUNA2000_TimeOfUsePeriod(120, 240, ChargeFlag.DISCHARGE, (False, True, False, True, False, True, False)),
+    ]
+    inverter = MagicMock(battery_type=rv.StorageProductModel.HUAWEI_LUNA2000)
+    assert ppr.decode(_encode(tou), 0, inverter) == tou
+
+
+def test__decode__tou_periods__LG_RESU():
+    tou = [LG_RESU_TimeOfUsePeriod(0, 120, 1), LG_RESU_TimeOfUsePeriod(120, 240, 2)]
+    inverter = MagicMock(battery_type=rv.StorageProductModel.LG_RESU)
+    assert ppr.decode(_encode(tou), 0, inverter) == tou
+
+
+def test__decode__tou_periods__invalid_model():
+    inverter = MagicMock(battery_type=rv.StorageProductModel.NONE)
+    with pytest.raises(expected_exception=DecodeError):
+        ppr.decode(_encode([]), 0, inverter)
+
+
+def test__decode__tou_periods__HUAWEI_LUNA2000__invalid_charge_flag():
+    payload = struct.pack(">HHHBB", 1, 0, 120, 2, 0x7F).ljust(2 + 14 * 6, b"\0")
+    inverter = MagicMock(battery_type=rv.StorageProductModel.HUAWEI_LUNA2000)
+    with pytest.raises(expected_exception=DecodeError, match="Invalid charge flag 2"):
+        ppr.decode(payload, 0, inverter)
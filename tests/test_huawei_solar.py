@@ -1,10 +1,26 @@
+import asyncio
 from datetime import datetime, timezone
-from unittest.mock import patch
+from hashlib import sha256
+import hmac
+import struct
+from unittest.mock import AsyncMock, MagicMock, patch
 
+from pymodbus.factory import ClientDecoder
+from pymodbus.pdu import ExceptionResponse, ModbusExceptions
 from pymodbus.register_read_message import ReadHoldingRegistersResponse
+from pymodbus.register_write_message import WriteMultipleRegistersResponse, WriteSingleRegisterResponse
+from pymodbus.utilities import computeCRC
 import pytest
 
-from huawei_solar.exceptions import DecodeError
+from huawei_solar.exceptions import ConnectionException, DecodeError, ReadException
+from huawei_solar.huawei_solar import (
+    CompleteUploadModbusRequest,
+    PrivateHuaweiModbusResponse,
+    RawReadHoldingRegistersResponse,
+    StartUploadModbusRequest,
+    UploadModbusRequest,
+    _plan_multiread,
+)
 import huawei_solar.register_names as rn
 import huawei_solar.register_values as rv
 from huawei_solar.register_values import GridCode
@@ -65,6 +81,23 @@ async def test_get_multiple(huawei_solar):
     assert result[1].unit is None
 
 
+def test_plan_multiread_with_gap():
+    first_register, total_length, payload_struct, _, units = _plan_multiread((rn.MODEL_NAME, rn.MODEL_ID))
+    assert first_register == 30000
+    assert total_length == 71
+    assert payload_struct.size == total_length * 2
+    assert units == (None, None)
+
+    payload = b"SUN2000".ljust(30, b"\0") + bytes(110) + struct.pack(">H", 348)
+    assert payload_struct.unpack_from(payload) == (b"SUN2000".ljust(30, b"\0"), 348)
+
+
+@pytest.mark.asyncio
+async def test_get_multiple_unknown_register(huawei_solar):
+    with pytest.raises(ValueError, match="does_not_exist"):
+        await huawei_solar.get_multiple([rn.MODEL_NAME, "does_not_exist"])
+
+
 @pytest.mark.asyncio
 async def test_get_model_id(huawei_solar):
     result = await huawei_solar.get("model_id")
@@ -570,3 +603,333 @@ async def test_get_time_zone(huawei_solar):
     result = await huawei_solar.get(rn.TIME_ZONE)
     assert result.value == 60
     assert result.unit == "min"
+
+
+def _private_response(data):
+    response = PrivateHuaweiModbusResponse()
+    response.decode(data)
+    return response
+
+
+def _file_upload_responses(file_type, file_data, frame_length, file_crc):
+    """Builds the sequence of responses an inverter sends while uploading a file."""
+
+    def _response(content):
+        return _private_response(bytes([0x05]) + content)
+
+    responses = [_response(struct.pack(">BBLB", 6, file_type, len(file_data), frame_length))]
+    for frame_no, offset in enumerate(range(0, len(file_data), frame_length)):
+        frame_data = file_data[offset : offset + frame_length]
+        responses.append(_response(struct.pack(">BBH", len(frame_data) + 3, file_type, frame_no) + frame_data))
+    responses.append(_response(struct.pack(">BBH", 3, file_type, file_crc)))
+    return responses
+
+
+@pytest.fixture(params=["fastcrc", "computeCRC"])
+def crc_implementation(request, monkeypatch):
+    """Runs a test with fastcrc, if it is installed, and with the computeCRC fallback."""
+    if request.param == "fastcrc":
+        pytest.importorskip("fastcrc")
+    else:
+        monkeypatch.setattr("huawei_solar.huawei_solar.crc16", None)
+    return request.param
+
+
+@pytest.mark.asyncio
+async def test_get_file(huawei_solar, crc_implementation):
+    file_data = bytes(range(256)) * 3
+    crc = computeCRC(file_data)
+    file_crc = ((crc << 8) & 0xFF00) | ((crc >> 8) & 0x00FF)
+
+    huawei_solar._client.execute = AsyncMock(side_effect=_file_upload_responses(0x45, file_data, 200, file_crc))
+
+    assert await huawei_solar.get_file(0x45) == file_data
+
+
+@pytest.mark.asyncio
+async def test_get_file_larger_than_preallocation(huawei_solar, monkeypatch):
+    monkeypatch.setattr("huawei_solar.huawei_solar.FILE_MAX_PREALLOCATION", 100)
+    file_data = bytes(range(256)) * 3
+    crc = computeCRC(file_data)
+    file_crc = ((crc << 8) & 0xFF00) | ((crc >> 8) & 0x00FF)
+
+    huawei_solar._client.execute = AsyncMock(side_effect=_file_upload_responses(0x45, file_data, 200, file_crc))
+
+    assert await huawei_solar.get_file(0x45) == file_data
+
+
+@pytest.mark.asyncio
+async def test_get_file_invalid_crc(huawei_solar, crc_implementation):
+    file_data = bytes(range(256))
+
+    huawei_solar._client.execute = AsyncMock(side_effect=_file_upload_responses(0x45, file_data, 200, 0x1234))
+
+    with pytest.raises(ReadException):
+        await huawei_solar.get_file(0x45)
+
+
+def test_file_upload_requests_roundtrip():
+    start_request = StartUploadModbusRequest(0x45, b"\x01\x02")
+    decoded_start_request = StartUploadModbusRequest(0)
+    decoded_start_request.decode(start_request.encode())
+    assert (decoded_start_request.file_type, decoded_start_request.customised_data) == (0x45, b"\x01\x02")
+
+    upload_request = UploadModbusRequest(0x45, 513)
+    decoded_upload_request = UploadModbusRequest(0, 0)
+    decoded_upload_request.decode(upload_request.encode())
+    assert (decoded_upload_request.file_type, decoded_upload_request.frame_no) == (0x45, 513)
+
+    complete_request = CompleteUploadModbusRequest(0x45)
+    decoded_complete_request = CompleteUploadModbusRequest(0)
+    decoded_complete_request.decode(complete_request.encode())
+    assert decoded_complete_request.file_type == 0x45
+
+
+@pytest.mark.asyncio
+async def test_login(huawei_solar):
+    inverter_challenge = bytes(range(16))
+    client_challenge = bytes(range(16, 32))
+    hashed_password = sha256(b"secret").digest()
+    inverter_mac = hmac.digest(hashed_password, client_challenge, sha256)
+
+    huawei_solar._client.protocol = MagicMock()
+    huawei_solar._client.protocol.execute = AsyncMock(
+        side_effect=[
+            _private_response(bytes([36, 0x11]) + inverter_challenge),
+            _private_response(bytes([37, 0x00, 0x00, len(inverter_mac)]) + inverter_mac),
+        ]
+    )
+
+    with patch("huawei_solar.huawei_solar.secrets.token_bytes", return_value=client_challenge):
+        assert await huawei_solar.login("installer", "secret") is True
+
+    login_request = huawei_solar._client.protocol.execute.call_args_list[1].args[0]
+    password_digest = hmac.digest(hashed_password, inverter_challenge, sha256)
+    assert login_request.content == (
+        bytes([16 + 1 + 9 + 1 + 32]) + client_challenge + bytes([9]) + b"installer" + bytes([32]) + password_digest
+    )
+
+
+@pytest.mark.asyncio
+async def test_login_invalid_inverter_mac(huawei_solar, caplog):
+    huawei_solar._client.protocol = MagicMock()
+    huawei_solar._client.protocol.execute = AsyncMock(
+        side_effect=[
+            _private_response(bytes([36, 0x11]) + bytes(16)),
+            _private_response(bytes([37, 0x00, 0x00, 32]) + bytes(32)),
+        ]
+    )
+
+    assert await huawei_solar.login("installer", "secret") is True
+    assert "invalid challenge answer" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_login_failed(huawei_solar):
+    huawei_solar._client.protocol = MagicMock()
+    huawei_solar._client.protocol.execute = AsyncMock(
+        side_effect=[
+            _private_response(bytes([36, 0x11]) + bytes(16)),
+            _private_response(bytes([37, 0x00, 0x01])),
+        ]
+    )
+
+    assert await huawei_solar.login("installer", "wrong") is False
+
+
+@pytest.mark.asyncio
+async def test_set(huawei_solar):
+    huawei_solar._client.write_register = AsyncMock(return_value=WriteSingleRegisterResponse(43006, 120))
+
+    assert await huawei_solar.set(rn.TIME_ZONE, 120) is True
+    huawei_solar._client.write_register.assert_awaited_once_with(43006, 120, slave=0)
+
+
+@pytest.mark.asyncio
+async def test_set_multiple_registers(huawei_solar):
+    huawei_solar._client.write_registers = AsyncMock(return_value=WriteMultipleRegistersResponse(40126, 2))
+
+    assert await huawei_solar.set(rn.FIXED_ACTIVE_POWER, 2500) is True
+    huawei_solar._client.write_registers.assert_awaited_once_with(40126, [0, 2500], slave=0)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_are_serialized(huawei_solar):
+    active_requests = 0
+    requested_registers = []
+
+    async def read_holding_registers(register, length, *args, **kwargs):
+        nonlocal active_requests
+        active_requests += 1
+        assert active_requests == 1, "Requests should never be executed concurrently"
+        requested_registers.append(register)
+
+        await asyncio.sleep(0.01)
+
+        active_requests -= 1
+        return ReadHoldingRegistersResponse([0] * length)
+
+    huawei_solar._client.read_holding_registers = read_holding_registers
+
+    await asyncio.gather(
+        huawei_solar.get(rn.PV_01_VOLTAGE),
+        huawei_solar.get(rn.TIME_ZONE),
+        huawei_solar.get(rn.STORAGE_UNIT_1_PRODUCT_MODEL),
+    )
+
+    assert requested_registers == [32016, 43006, 47000]
+
+
+@pytest.mark.asyncio
+async def test_stop_fails_queued_requests(huawei_solar):
+    read_started = asyncio.Event()
+
+    async def read_holding_registers(register, length, *args, **kwargs):
+        read_started.set()
+        await asyncio.sleep(10)
+
+    huawei_solar._client.read_holding_registers = read_holding_registers
+    huawei_solar._client.close = AsyncMock()
+
+    requests = [
+        asyncio.create_task(huawei_solar.get(name))
+        for name in (rn.PV_01_VOLTAGE, rn.TIME_ZONE, rn.STORAGE_UNIT_1_PRODUCT_MODEL)
+    ]
+    await read_started.wait()
+    await huawei_solar.stop()
+
+    results = await asyncio.wait_for(asyncio.gather(*requests, return_exceptions=True), 1)
+    assert all(isinstance(result, ConnectionException) for result in results)
+    huawei_solar._client.close.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_no_requests_after_stop(huawei_solar):
+    read_started = asyncio.Event()
+
+    async def read_holding_registers(register, length, *args, **kwargs):
+        read_started.set()
+        await asyncio.sleep(10)
+
+    huawei_solar._client.read_holding_registers = AsyncMock(side_effect=read_holding_registers)
+    huawei_solar._client.close = AsyncMock()
+    huawei_solar._request_queue = asyncio.Queue(maxsize=1)
+
+    # the first request is taken by the dispatcher, the second fills the queue and the third waits for room
+    requests = [
+        asyncio.create_task(huawei_solar.get(name))
+        for name in (rn.PV_01_VOLTAGE, rn.TIME_ZONE, rn.STORAGE_UNIT_1_PRODUCT_MODEL)
+    ]
+    await read_started.wait()
+    await asyncio.sleep(0)
+    await huawei_solar.stop()
+
+    results = await asyncio.wait_for(asyncio.gather(*requests, return_exceptions=True), 1)
+    assert all(isinstance(result, ConnectionException) for result in results)
+
+    with pytest.raises(ConnectionException):
+        await asyncio.wait_for(huawei_solar.get(rn.PV_01_VOLTAGE), 1)
+
+    huawei_solar._client.read_holding_registers.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_cooldown_between_requests(huawei_solar):
+    huawei_solar._cooldown_time = 0.05
+    loop = asyncio.get_running_loop()
+    request_times = []
+
+    async def read_holding_registers(register, length, *args, **kwargs):
+        request_times.append(loop.time())
+        return ReadHoldingRegistersResponse([0] * length)
+
+    huawei_solar._client.read_holding_registers = read_holding_registers
+
+    start_time = loop.time()
+    await huawei_solar.get(rn.PV_01_VOLTAGE)
+    await huawei_solar.get(rn.TIME_ZONE)
+
+    assert request_times[0] - start_time < 0.05  # no cooldown needed for the first request
+    assert request_times[1] - request_times[0] >= 0.05
+
+
+@pytest.mark.asyncio
+async def test_concurrent_reads_are_merged(huawei_solar):
+    async def read_holding_registers(register, length, *args, **kwargs):
+        return ReadHoldingRegistersResponse(list(range(register, register + length)))
+
+    huawei_solar._client.read_holding_registers = AsyncMock(side_effect=read_holding_registers)
+
+    pv_01_current, pv_01_voltage, input_power, time_zone = await asyncio.gather(
+        huawei_solar.get(rn.PV_01_CURRENT),
+        huawei_solar.get(rn.PV_01_VOLTAGE),
+        huawei_solar.get(rn.INPUT_POWER),
+        huawei_solar.get(rn.TIME_ZONE),
+    )
+
+    assert pv_01_current.value == 32017 / 100
+    assert pv_01_voltage.value == 32016 / 10
+    assert input_power.value == (32064 << 16) + 32065
+    assert time_zone.value == 43006 - 2**16  # signed register
+
+    assert [call.args[:2] for call in huawei_solar._client.read_holding_registers.await_args_list] == [
+        (32016, 50),
+        (43006, 1),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_reads_are_retried_separately_after_modbus_error(huawei_solar):
+    async def read_holding_registers(register, length, *args, **kwargs):
+        if length > 2:
+            return ExceptionResponse(0x03, ModbusExceptions.IllegalAddress)
+        return ReadHoldingRegistersResponse(list(range(register, register + length)))
+
+    huawei_solar._client.read_holding_registers = AsyncMock(side_effect=read_holding_registers)
+
+    pv_01_voltage, input_power = await asyncio.gather(
+        huawei_solar.get(rn.PV_01_VOLTAGE),
+        huawei_solar.get(rn.INPUT_POWER),
+    )
+
+    assert pv_01_voltage.value == 32016 / 10
+    assert input_power.value == (32064 << 16) + 32065
+
+    assert [call.args[:2] for call in huawei_solar._client.read_holding_registers.await_args_list] == [
+        (32016, 50),
+        (32016, 1),
+        (32064, 2),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_stop_fails_reads_retried_separately(huawei_solar):
+    huawei_solar._cooldown_time = 0.5
+
+    async def read_holding_registers(register, length, *args, **kwargs):
+        if length > 2:
+            return ExceptionResponse(0x03, ModbusExceptions.IllegalAddress)
+        return ReadHoldingRegistersResponse(list(range(register, register + length)))
+
+    huawei_solar._client.read_holding_registers = read_holding_registers
+    huawei_solar._client.close = AsyncMock()
+
+    requests = [
+        asyncio.create_task(huawei_solar.get(name)) for name in (rn.PV_01_VOLTAGE, rn.INPUT_POWER, rn.GRID_VOLTAGE)
+    ]
+    await asyncio.sleep(0.2)  # the dispatcher waits for the cooldown before reading the registers one by one
+    await huawei_solar.stop()
+
+    results = await asyncio.wait_for(asyncio.gather(*requests, return_exceptions=True), 1)
+    assert all(isinstance(result, ConnectionException) for result in results)
+
+
+def test_raw_read_holding_registers_response():
+    decoder = ClientDecoder()
+    decoder.register(RawReadHoldingRegistersResponse)
+
+    response = decoder.decode(bytes([0x03, 0x04, 0x01, 0x02, 0x03, 0x04]))
+
+    assert isinstance(response, RawReadHoldingRegistersResponse)
+    assert response.payload == b"\x01\x02\x03\x04"
+    assert response.registers == [0x0102, 0x0304]
@@ -1,8 +1,19 @@
+import random
+import struct
+
 from pymodbus.constants import Endian
-from pymodbus.payload import BinaryPayloadBuilder, BinaryPayloadDecoder
+from pymodbus.payload import BinaryPayloadBuilder
 
 import huawei_solar.register_names as rn
-from huawei_solar.registers import REGISTERS, PeakSettingPeriod
+import huawei_solar.register_values as rv
+from huawei_solar.registers import (
+    _GAIN_CONVERTERS,
+    REGISTERS,
+    ChargeDischargePeriod,
+    PeakSettingPeriod,
+    bitfield_decoder,
+    make_bitfield_decoder,
+)
 
 
 def test_capacity_control_register():
@@ -17,10 +28,51 @@ def test_capacity_control_register():
     builder = BinaryPayloadBuilder(byteorder=Endian.Big, wordorder=Endian.Big)
     pspr.encode(value, builder)
 
-    payload = builder.to_registers()
-
-    decoder = BinaryPayloadDecoder.fromRegisters(payload, byteorder=Endian.Big, wordorder=Endian.Big)
+    payload = builder.to_string()
 
-    decoded_result = pspr.decode(decoder, None)
+    decoded_result = pspr.decode(payload, 0, None)
 
     assert decoded_result == value
+
+
+def test_make_bitfield_decoder():
+    definitions = [
+        getattr(rv, name) for name in dir(rv) if name.startswith("STATE_CODES_") or name.startswith("ALARM_CODES_")
+    ]
+    assert len(definitions) == 6
+
+    rng = random.Random(0)
+    bitfields = [0, 1, 0b1010, 0x8001, 0xFFFF, 0x10000, 0x80000000, 0xFFFFFFFF]
+    bitfields += [rng.getrandbits(32) for _ in range(1000)]
+
+    for definition in definitions:
+        decoder = make_bitfield_decoder(definition)
+        for bitfield in bitfields:
+            assert decoder(bitfield) == bitfield_decoder(definition, bitfield)
+
+
+def test_charge_discharge_period_register():
+    value = [
+        ChargeDischargePeriod(0, 120, 2500),
+        ChargeDischargePeriod(120, 1439, 1000),
+    ]
+
+    cdpr = REGISTERS[rn.STORAGE_FIXED_CHARGING_AND_DISCHARGING_PERIODS]
+
+    builder = BinaryPayloadBuilder(byteorder=Endian.Big, wordorder=Endian.Big)
+    cdpr.encode(value, builder)
+
+    assert cdpr.decode(builder.to_string(), 0, None) == value
+
+
+def test_decode_from_memoryview():
+    payload = memoryview(b"\x01\x02" + b"SUN2000".ljust(30, b"\0") + struct.pack(">H", 348))
+
+    assert REGISTERS[rn.MODEL_NAME].decode(payload, 2, None) == "SUN2000"
+    assert REGISTERS[rn.MODEL_ID].decode(payload, 32, None) == 348
+
+
+def test_gain_converters():
+    for gain, convert in _GAIN_CONVERTERS.items():
+        for value in (0, 1, 3, 2073, 65535, -32768):
+            assert convert(value) == value / gain